@@ -0,0 +1,305 @@
+"""
+Compiled kernels for the TA indicators in main.py.
+
+Each kernel takes raw float64 arrays and returns float64 arrays, so the
+recurrences run as tight loops instead of going through pandas' window
+machinery. Numba is optional — without it the kernels run as plain Python.
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # pragma: no cover - numba is optional
+    njit = lambda **k: (lambda f: f)  # noqa: E731
+
+
+# ── EWMA ─────────────────────────────────
+@njit(cache=True)
+def _ewma_step(weighted, old_wt, cur, alpha):
+    """One step of pandas' adjust=False EWMA recurrence."""
+    if weighted == weighted:
+        old_wt *= 1.0 - alpha
+        if cur == cur:
+            if weighted != cur:
+                weighted = (old_wt * weighted + alpha * cur) / (old_wt + alpha)
+            old_wt = 1.0
+    elif cur == cur:
+        weighted = cur
+    return weighted, old_wt
+
+
+@njit(cache=True)
+def _ewma(x, alpha, min_periods):
+    """
+    Mirrors pandas `ewm(alpha=..., adjust=False).mean()`,
+    including its handling of NaN inputs and min_periods.
+    """
+    n = x.shape[0]
+    out = np.empty(n, dtype=np.float64)
+    minp = max(min_periods, 1)
+    weighted = np.nan
+    old_wt = 1.0
+    nobs = 0
+
+    for i in range(n):
+        cur = x[i]
+        if cur == cur:
+            nobs += 1
+        weighted, old_wt = _ewma_step(weighted, old_wt, cur, alpha)
+        out[i] = weighted if nobs >= minp else np.nan
+    return out
+
+
+# ── RSI (Wilder's smoothing) ─────────────
+@njit(cache=True)
+def _rsi(close, period):
+    n = close.shape[0]
+    gain = np.empty(n, dtype=np.float64)
+    loss = np.empty(n, dtype=np.float64)
+    if n > 0:
+        gain[0] = np.nan
+        loss[0] = np.nan
+    for i in range(1, n):
+        d = close[i] - close[i - 1]
+        if d != d:
+            gain[i] = np.nan
+            loss[i] = np.nan
+        elif d > 0:
+            gain[i] = d
+            loss[i] = 0.0
+        else:
+            gain[i] = 0.0
+            loss[i] = -d
+
+    alpha = 1.0 / period
+    avg_gain = _ewma(gain, alpha, period)
+    avg_loss = _ewma(loss, alpha, period)
+
+    out = np.empty(n, dtype=np.float64)
+    for i in range(n):
+        al = avg_loss[i]
+        if al == 0.0:
+            al = 1e-10
+        out[i] = 100.0 - 100.0 / (1.0 + avg_gain[i] / al)
+    return out
+
+
+# ── EMA / MACD ───────────────────────────
+@njit(cache=True)
+def _ema(close, span):
+    return _ewma(close, 2.0 / (span + 1.0), 0)
+
+
+@njit(cache=True)
+def _macd(close, fast, slow, signal):
+    macd_line = _ema(close, fast) - _ema(close, slow)
+    sig_line = _ema(macd_line, signal)
+    return macd_line, sig_line, macd_line - sig_line
+
+
+# ── Fused enrich ─────────────────────────
+# Output columns of `_enrich_all`, in the order TA.enrich appends them.
+ENRICH_COLUMNS = (
+    "rsi_14", "sma_20", "sma_50", "ema_12", "ema_26",
+    "macd", "macd_signal", "macd_histogram",
+    "bb_upper", "bb_middle", "bb_lower",
+    "vwap", "atr_14", "stoch_k", "stoch_d", "obv",
+)
+
+RSI_PERIOD = 14
+SMA_FAST, SMA_SLOW = 20, 50
+EMA_FAST, EMA_SLOW, MACD_SIGNAL = 12, 26, 9
+BB_PERIOD, BB_STD = 20, 2.0
+ATR_PERIOD = 14
+STOCH_K, STOCH_D = 14, 3
+
+
+@njit(cache=True)
+def _roll_sum_step(x, i, window, s, nobs):
+    """Slide a running (sum, count) window of non-NaN values to end at i."""
+    v = x[i]
+    if v == v:
+        s += v
+        nobs += 1
+    if i >= window:
+        v = x[i - window]
+        if v == v:
+            s -= v
+            nobs -= 1
+    return s, nobs
+
+
+@njit(cache=True, boundscheck=False)
+def _enrich_all(o, h, l, c, v,
+                out_rsi, out_sma20, out_sma50, out_ema12, out_ema26,
+                out_macd, out_sig, out_hist, out_bbu, out_bbm, out_bbl,
+                out_vwap, out_atr, out_k, out_d, out_obv):
+    """
+    Every TA.enrich indicator in a single pass over the OHLCV arrays.
+    Matches the standalone TA methods (pandas rolling/ewm semantics,
+    NaN handling included).
+    """
+    n = c.shape[0]
+    nan = np.nan
+
+    # RSI / EMA / MACD — EWMA state
+    rsi_alpha = 1.0 / RSI_PERIOD
+    a_fast = 2.0 / (EMA_FAST + 1.0)
+    a_slow = 2.0 / (EMA_SLOW + 1.0)
+    a_sig = 2.0 / (MACD_SIGNAL + 1.0)
+    avg_gain, wt_gain = nan, 1.0
+    avg_loss, wt_loss = nan, 1.0
+    rsi_nobs = 0
+    ema_f, wt_f = nan, 1.0
+    ema_s, wt_s = nan, 1.0
+    sig, wt_sig = nan, 1.0
+
+    # SMA sums, Bollinger Welford state
+    s20, n20 = 0.0, 0
+    s50, n50 = 0.0, 0
+    bb_mean, bb_ssq, bb_n = 0.0, 0.0, 0
+
+    # ATR / Stochastic
+    tr = np.empty(n, dtype=np.float64)
+    s_tr, n_tr = 0.0, 0
+    s_k, n_k = 0.0, 0
+    lo_q = np.empty(n, dtype=np.int64)
+    hi_q = np.empty(n, dtype=np.int64)
+    lo_head, lo_tail, lo_n = 0, 0, 0
+    hi_head, hi_tail, hi_n = 0, 0, 0
+
+    # VWAP / OBV cumulative sums
+    cum_pv, cum_v, cum_obv = 0.0, 0.0, 0.0
+
+    for i in range(n):
+        ci = c[i]
+        c_prev = c[i - 1] if i > 0 else nan
+
+        # RSI
+        d = ci - c_prev
+        if d == d:
+            rsi_nobs += 1
+            gain = d if d > 0 else 0.0
+            loss = -d if d < 0 else 0.0
+        else:
+            gain = nan
+            loss = nan
+        avg_gain, wt_gain = _ewma_step(avg_gain, wt_gain, gain, rsi_alpha)
+        avg_loss, wt_loss = _ewma_step(avg_loss, wt_loss, loss, rsi_alpha)
+        if rsi_nobs >= RSI_PERIOD:
+            al = avg_loss if avg_loss != 0.0 else 1e-10
+            out_rsi[i] = 100.0 - 100.0 / (1.0 + avg_gain / al)
+        else:
+            out_rsi[i] = nan
+
+        # SMA
+        s20, n20 = _roll_sum_step(c, i, SMA_FAST, s20, n20)
+        s50, n50 = _roll_sum_step(c, i, SMA_SLOW, s50, n50)
+        out_sma20[i] = s20 / n20 if n20 >= SMA_FAST else nan
+        out_sma50[i] = s50 / n50 if n50 >= SMA_SLOW else nan
+
+        # EMA / MACD
+        ema_f, wt_f = _ewma_step(ema_f, wt_f, ci, a_fast)
+        ema_s, wt_s = _ewma_step(ema_s, wt_s, ci, a_slow)
+        m = ema_f - ema_s
+        sig, wt_sig = _ewma_step(sig, wt_sig, m, a_sig)
+        out_ema12[i] = ema_f
+        out_ema26[i] = ema_s
+        out_macd[i] = m
+        out_sig[i] = sig
+        out_hist[i] = m - sig
+
+        # Bollinger — Welford add/remove for the rolling sample std
+        if i >= BB_PERIOD:
+            x_old = c[i - BB_PERIOD]
+            if x_old == x_old:
+                bb_n -= 1
+                if bb_n:
+                    prev_mean = bb_mean
+                    bb_mean -= (x_old - bb_mean) / bb_n
+                    bb_ssq -= (x_old - prev_mean) * (x_old - bb_mean)
+                else:
+                    bb_mean, bb_ssq = 0.0, 0.0
+        if ci == ci:
+            bb_n += 1
+            prev_mean = bb_mean
+            bb_mean += (ci - bb_mean) / bb_n
+            bb_ssq += (ci - prev_mean) * (ci - bb_mean)
+        if bb_n >= BB_PERIOD:
+            sd = np.sqrt(max(bb_ssq / (bb_n - 1), 0.0))
+            mid = out_sma20[i]
+            out_bbu[i] = mid + BB_STD * sd
+            out_bbm[i] = mid
+            out_bbl[i] = mid - BB_STD * sd
+        else:
+            out_bbu[i] = nan
+            out_bbm[i] = nan
+            out_bbl[i] = nan
+
+        # VWAP
+        pv = (h[i] + l[i] + ci) / 3.0 * v[i]
+        if pv == pv:
+            cum_pv += pv
+        vi = v[i]
+        if vi == vi:
+            cum_v += vi
+            vol = cum_v if cum_v != 0.0 else 1e-10
+            out_vwap[i] = cum_pv / vol if pv == pv else nan
+        else:
+            out_vwap[i] = nan
+
+        # ATR
+        t = nan
+        for x in (h[i] - l[i], abs(h[i] - c_prev), abs(l[i] - c_prev)):
+            if x == x and not (t >= x):
+                t = x
+        tr[i] = t
+        s_tr, n_tr = _roll_sum_step(tr, i, ATR_PERIOD, s_tr, n_tr)
+        out_atr[i] = s_tr / n_tr if n_tr >= ATR_PERIOD else nan
+
+        # Stochastic — monotonic deques for rolling low-min / high-max
+        start = i - STOCH_K
+        if start >= 0:
+            if l[start] == l[start]:
+                lo_n -= 1
+            if h[start] == h[start]:
+                hi_n -= 1
+        if lo_tail > lo_head and lo_q[lo_head] <= start:
+            lo_head += 1
+        if hi_tail > hi_head and hi_q[hi_head] <= start:
+            hi_head += 1
+        li = l[i]
+        if li == li:
+            lo_n += 1
+            while lo_tail > lo_head and l[lo_q[lo_tail - 1]] >= li:
+                lo_tail -= 1
+            lo_q[lo_tail] = i
+            lo_tail += 1
+        hi = h[i]
+        if hi == hi:
+            hi_n += 1
+            while hi_tail > hi_head and h[hi_q[hi_tail - 1]] <= hi:
+                hi_tail -= 1
+            hi_q[hi_tail] = i
+            hi_tail += 1
+        if lo_n >= STOCH_K and hi_n >= STOCH_K:
+            low_k = l[lo_q[lo_head]]
+            rng = h[hi_q[hi_head]] - low_k
+            if rng == 0.0:
+                rng = 1e-10
+            out_k[i] = 100.0 * (ci - low_k) / rng
+        else:
+            out_k[i] = nan
+        s_k, n_k = _roll_sum_step(out_k, i, STOCH_D, s_k, n_k)
+        out_d[i] = s_k / n_k if n_k >= STOCH_D else nan
+
+        # OBV
+        step = 0.0
+        if d > 0:
+            step = v[i]
+        elif d < 0:
+            step = -v[i]
+        if step == step:
+            cum_obv += step
+        out_obv[i] = cum_obv
@@ -6,12 +6,17 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import math
+import sys
+import threading
 import time
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
+import orjson
 import pandas as pd
 import yfinance as yf
 from fastapi import (
@@ -23,7 +28,14 @@ from fastapi import (
     WebSocketDisconnect,
 )
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
+
+try:
+    import bottleneck as bn
+except ImportError:  # optional — rolling windows fall back to numpy
+    bn = None
+
+from _ta_kernels import ENRICH_COLUMNS, _ema, _enrich_all, _macd, _rsi
 
 # ── Logging ──────────────────────────────
 logging.basicConfig(
@@ -42,20 +54,28 @@ log = logging.getLogger("stock-api")
 
 YAHOO_MIN_GAP = 2.0          # minimum seconds between ANY yfinance call
 _last_yahoo_call = 0.0        # timestamp of last call
+_yahoo_lock = threading.Lock()
+
+# Blocking yfinance work from async code runs here, never on the event loop
+YF_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="yf")
 
 
 def yahoo_throttle():
-    """Global throttle — ensures we never call Yahoo too fast."""
+    """
+    Global throttle — ensures we never call Yahoo too fast.
+    Blocking: only call from worker threads (YF_POOL / sync endpoints).
+    """
     global _last_yahoo_call
-    now = time.time()
-    wait = YAHOO_MIN_GAP - (now - _last_yahoo_call)
-    if wait > 0:
-        time.sleep(wait)
-    _last_yahoo_call = time.time()
+    with _yahoo_lock:
+        now = time.time()
+        wait = YAHOO_MIN_GAP - (now - _last_yahoo_call)
+        if wait > 0:
+            time.sleep(wait)
+        _last_yahoo_call = time.time()
 
 
 def safe_history(ticker_str: str, **kwargs) -> pd.DataFrame:
-    """Rate-limited wrapper around yf.Ticker().history()"""
+    """Rate-limited wrapper around yf.Ticker().history() (blocking)"""
     yahoo_throttle()
     try:
         return yf.Ticker(ticker_str).history(**kwargs)
@@ -69,26 +89,51 @@ def safe_history(ticker_str: str, **kwargs) -> pd.DataFrame:
 
 # ── Cache ────────────────────────────────
 class TTLCache:
+    """
+    TTL cache with LRU eviction once max_size is reached.
+    Entries set with prerender=True also keep their JSON encoding, so
+    cache hits can be served as raw bytes without re-serialising.
+    """
+
+    JSON_OPTS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
     def __init__(self, max_size=300):
-        self._store: Dict[str, Tuple[float, Any]] = {}
+        # key -> (expires_at, value, json bytes or None)
+        self._store: OrderedDict[str, Tuple[float, Any, Optional[bytes]]] = OrderedDict()
         self._max = max_size
+        # Written from YF_POOL workers, the endpoint threadpool and the
+        # event loop at once; get-then-move_to_end must not interleave
+        # with another thread's eviction
+        self._lock = threading.Lock()
+
+    def _entry(self, key: str):
+        with self._lock:
+            entry = self._store.get(key)
+            if not entry:
+                return None
+            if time.time() >= entry[0]:
+                del self._store[key]
+                return None
+            self._store.move_to_end(key)
+            return entry
 
     def get(self, key: str):
-        entry = self._store.get(key)
-        if not entry:
-            return None
-        if time.time() >= entry[0]:
-            del self._store[key]
-            return None
-        return entry[1]
-
-    def set(self, key: str, value, ttl=60):
-        if len(self._store) >= self._max:
-            now = time.time()
-            self._store = {
-                k: v for k, v in self._store.items() if v[0] > now
-            }
-        self._store[key] = (time.time() + ttl, value)
+        entry = self._entry(key)
+        return entry[1] if entry else None
+
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        entry = self._entry(key)
+        return entry[2] if entry else None
+
+    def set(self, key: str, value, ttl=60, prerender=False) -> Optional[bytes]:
+        """Store value; with prerender, also return its JSON bytes."""
+        raw = orjson.dumps(value, option=self.JSON_OPTS) if prerender else None
+        with self._lock:
+            if key not in self._store and len(self._store) >= self._max:
+                self._store.popitem(last=False)
+            self._store[key] = (time.time() + ttl, value, raw)
+            self._store.move_to_end(key)
+        return raw
 
     @property
     def size(self):
@@ -100,64 +145,114 @@ cache = TTLCache()
 
 # ── Rate Limiter (for API clients) ───────
 class RateLimiter:
-    def __init__(self, limit=60, window=60):
-        self._hits: Dict[str, List[float]] = defaultdict(list)
-        self._limit = limit
-        self._window = window
+    """Token bucket per client: O(1) per request, bounded memory."""
+
+    IDLE_EVICT = 300  # drop buckets untouched for 5 min
+
+    def __init__(self, capacity=60, refill_rate=1.0):
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._capacity = capacity
+        self._rate = refill_rate  # tokens per second
+        self._last_sweep = time.time()
 
     def allow(self, client: str) -> bool:
         now = time.time()
-        cutoff = now - self._window
-        self._hits[client] = [
-            t for t in self._hits[client] if t > cutoff
-        ]
-        if len(self._hits[client]) >= self._limit:
+        if now - self._last_sweep > self.IDLE_EVICT:
+            self._sweep(now)
+
+        tokens, ts = self._buckets.get(client, (self._capacity, now))
+        tokens = min(self._capacity, tokens + (now - ts) * self._rate)
+        if tokens < 1:
+            self._buckets[client] = (tokens, now)
             return False
-        self._hits[client].append(now)
+        self._buckets[client] = (tokens - 1, now)
         return True
 
+    def _sweep(self, now: float):
+        # An idle bucket has refilled to capacity, so forgetting it is lossless
+        cutoff = now - self.IDLE_EVICT
+        self._buckets = {
+            k: v for k, v in self._buckets.items() if v[1] > cutoff
+        }
+        self._last_sweep = now
+
 
 limiter = RateLimiter()
 
 
 # ── Technical Analysis ───────────────────
+def _rolling(arr: np.ndarray, window: int, move: str, reduce, **kw) -> np.ndarray:
+    """
+    Rolling window over a raw float64 array with pandas' default
+    min_periods=window semantics. Uses bottleneck.<move> when available.
+    """
+    if len(arr) < window:
+        # pandas gives all-NaN here; bottleneck would raise
+        return np.full(len(arr), np.nan)
+    if bn is not None:
+        return getattr(bn, move)(arr, window, min_count=window, **kw)
+    # NaN only poisons the windows it falls in, like pandas
+    windows = np.lib.stride_tricks.sliding_window_view(arr, window)
+    out = np.full(len(arr), np.nan)
+    out[window - 1:] = reduce(windows, axis=1, **kw)
+    return out
+
+
+def rolling_mean(arr, window):
+    return _rolling(arr, window, "move_mean", np.mean)
+
+
+def rolling_std(arr, window):
+    return _rolling(arr, window, "move_std", np.std, ddof=1)
+
+
+def rolling_min(arr, window):
+    return _rolling(arr, window, "move_min", np.min)
+
+
+def rolling_max(arr, window):
+    return _rolling(arr, window, "move_max", np.max)
+
+
 class TA:
     @staticmethod
     def rsi(close: pd.Series, period=14) -> pd.Series:
-        delta = close.diff()
-        gain = delta.clip(lower=0)
-        loss = (-delta).clip(lower=0)
-        avg_gain = gain.ewm(
-            alpha=1 / period, min_periods=period, adjust=False
-        ).mean()
-        avg_loss = loss.ewm(
-            alpha=1 / period, min_periods=period, adjust=False
-        ).mean()
-        rs = avg_gain / avg_loss.replace(0, 1e-10)
-        return 100 - (100 / (1 + rs))
+        arr = _rsi(close.to_numpy(dtype=np.float64, copy=False), period)
+        return pd.Series(arr, index=close.index)
 
     @staticmethod
     def sma(close, period):
-        return close.rolling(window=period).mean()
+        arr = rolling_mean(close.to_numpy(dtype=np.float64), period)
+        return pd.Series(arr, index=close.index)
 
     @staticmethod
     def ema(close, period):
-        return close.ewm(span=period, adjust=False).mean()
+        arr = _ema(close.to_numpy(dtype=np.float64, copy=False), period)
+        return pd.Series(arr, index=close.index)
 
     @staticmethod
     def macd(close, fast=12, slow=26, signal=9):
-        ema_f = close.ewm(span=fast, adjust=False).mean()
-        ema_s = close.ewm(span=slow, adjust=False).mean()
-        macd_line = ema_f - ema_s
-        sig_line = macd_line.ewm(span=signal, adjust=False).mean()
-        hist = macd_line - sig_line
-        return macd_line, sig_line, hist
+        macd_line, sig_line, hist = _macd(
+            close.to_numpy(dtype=np.float64, copy=False), fast, slow, signal
+        )
+        idx = close.index
+        return (
+            pd.Series(macd_line, index=idx),
+            pd.Series(sig_line, index=idx),
+            pd.Series(hist, index=idx),
+        )
 
     @staticmethod
     def bollinger(close, period=20, std=2.0):
-        mid = close.rolling(window=period).mean()
-        s = close.rolling(window=period).std()
-        return mid + std * s, mid, mid - std * s
+        arr = close.to_numpy(dtype=np.float64)
+        mid = rolling_mean(arr, period)
+        s = rolling_std(arr, period)
+        idx = close.index
+        return (
+            pd.Series(mid + std * s, index=idx),
+            pd.Series(mid, index=idx),
+            pd.Series(mid - std * s, index=idx),
+        )
 
     @staticmethod
     def vwap(df):
@@ -168,61 +263,77 @@ class TA:
 
     @staticmethod
     def atr(df, period=14):
-        tr = pd.concat([
-            df["High"] - df["Low"],
-            (df["High"] - df["Close"].shift()).abs(),
-            (df["Low"] - df["Close"].shift()).abs(),
-        ], axis=1).max(axis=1)
-        return tr.rolling(window=period).mean()
+        h = df["High"].to_numpy(dtype=np.float64)
+        l = df["Low"].to_numpy(dtype=np.float64)
+        c = df["Close"].to_numpy(dtype=np.float64)
+        c_prev = np.empty_like(c)
+        c_prev[:1] = np.nan
+        c_prev[1:] = c[:-1]
+        # fmax skips NaN like DataFrame.max(axis=1) (first row has no c_prev)
+        tr = np.fmax.reduce([h - l, np.abs(h - c_prev), np.abs(l - c_prev)])
+        return pd.Series(rolling_mean(tr, period), index=df.index)
 
     @staticmethod
     def stochastic(df, k=14, d=3):
-        low_k = df["Low"].rolling(k).min()
-        high_k = df["High"].rolling(k).max()
-        stoch_k = 100 * (df["Close"] - low_k) / (
-            high_k - low_k
-        ).replace(0, 1e-10)
-        stoch_d = stoch_k.rolling(d).mean()
-        return stoch_k, stoch_d
+        low_k = rolling_min(df["Low"].to_numpy(dtype=np.float64), k)
+        high_k = rolling_max(df["High"].to_numpy(dtype=np.float64), k)
+        rng = high_k - low_k
+        rng[rng == 0] = 1e-10
+        stoch_k = 100 * (df["Close"].to_numpy(dtype=np.float64) - low_k) / rng
+        stoch_d = rolling_mean(stoch_k, d)
+        return (
+            pd.Series(stoch_k, index=df.index),
+            pd.Series(stoch_d, index=df.index),
+        )
 
     @staticmethod
     def obv(df):
-        direction = np.sign(df["Close"].diff())
-        return (direction * df["Volume"]).fillna(0).cumsum()
+        c = df["Close"].to_numpy(dtype=np.float64)
+        v = df["Volume"].to_numpy(dtype=np.float64)
+        d = np.zeros_like(c)
+        np.subtract(c[1:], c[:-1], out=d[1:])
+        signed = np.sign(d) * v
+        signed[np.isnan(signed)] = 0  # fillna(0): gaps add nothing
+        return pd.Series(np.cumsum(signed), index=df.index)
 
     @classmethod
     def enrich(cls, df):
-        out = df.copy()
-        c = out["Close"]
-        out["rsi_14"] = cls.rsi(c)
-        out["sma_20"] = cls.sma(c, 20)
-        out["sma_50"] = cls.sma(c, 50)
-        out["ema_12"] = cls.ema(c, 12)
-        out["ema_26"] = cls.ema(c, 26)
-        out["macd"], out["macd_signal"], out["macd_histogram"] = cls.macd(c)
-        out["bb_upper"], out["bb_middle"], out["bb_lower"] = cls.bollinger(c)
-        out["vwap"] = cls.vwap(out)
-        out["atr_14"] = cls.atr(out)
-        out["stoch_k"], out["stoch_d"] = cls.stochastic(out)
-        out["obv"] = cls.obv(out)
-        return out
+        n = len(df)
+        cols = {name: np.empty(n) for name in ENRICH_COLUMNS}
+        _enrich_all(
+            np.ascontiguousarray(df["Open"].to_numpy(dtype=np.float64)),
+            np.ascontiguousarray(df["High"].to_numpy(dtype=np.float64)),
+            np.ascontiguousarray(df["Low"].to_numpy(dtype=np.float64)),
+            np.ascontiguousarray(df["Close"].to_numpy(dtype=np.float64)),
+            np.ascontiguousarray(df["Volume"].to_numpy(dtype=np.float64)),
+            *cols.values(),
+        )
+        # Reuse the source column buffers rather than copying the frame
+        base = {name: df[name].to_numpy() for name in df.columns}
+        return pd.DataFrame({**base, **cols}, index=df.index, copy=False)
 
 
 # ── Signal Engine ────────────────────────
 class SignalEngine:
+    COLUMNS = (
+        "Close", "rsi_14", "macd", "macd_signal",
+        "bb_upper", "bb_lower", "stoch_k", "vwap",
+    )
+    _IDX = {c: i for i, c in enumerate(COLUMNS)}
+
     @classmethod
     def evaluate(cls, df):
         if len(df) < 2:
             return []
 
-        cur = df.iloc[-1]
-        prev = df.iloc[-2]
-        price = float(cur["Close"])
+        prev, cur = df.iloc[-2:][list(cls.COLUMNS)].to_numpy(dtype=np.float64)
+        idx = cls._IDX
+        price = float(cur[idx["Close"]])
         signals = []
 
-        def safe(col):
-            v = cur.get(col)
-            return float(v) if pd.notnull(v) else None
+        def safe(col, row=cur):
+            v = float(row[idx[col]])
+            return None if math.isnan(v) else v
 
         # RSI
         rsi = safe("rsi_14")
@@ -242,10 +353,8 @@ class SignalEngine:
 
         # MACD
         m, ms_ = safe("macd"), safe("macd_signal")
-        pm = prev.get("macd")
-        ps = prev.get("macd_signal")
-        if all(pd.notnull(v) for v in [m, ms_, pm, ps]):
-            pm, ps = float(pm), float(ps)
+        pm, ps = safe("macd", prev), safe("macd_signal", prev)
+        if None not in (m, ms_, pm, ps):
             if pm <= ps and m > ms_:
                 signals.append({"indicator": "MACD", "signal": "BUY",
                                 "value": round(m, 4),
@@ -324,15 +433,20 @@ class WSManager:
         log.info(f"WS- {ticker} (total {self.count})")
 
     async def broadcast(self, ticker, payload):
-        dead = []
-        for ws in self._pool.get(ticker, []):
-            try:
-                await ws.send_json(payload)
-            except Exception:
-                dead.append(ws)
-        for ws in dead:
-            if ws in self._pool.get(ticker, []):
-                self._pool[ticker].remove(ws)
+        pool = list(self._pool.get(ticker, []))
+        if not pool:
+            return
+        # Encode once for every subscriber; text frame so the browser's
+        # JSON.parse(e.data) keeps working
+        text = orjson.dumps(payload).decode()
+        results = await asyncio.gather(
+            *(ws.send_text(text) for ws in pool), return_exceptions=True
+        )
+        dead = {id(ws) for ws, r in zip(pool, results) if isinstance(r, Exception)}
+        if dead and ticker in self._pool:
+            self._pool[ticker] = [
+                ws for ws in self._pool[ticker] if id(ws) not in dead
+            ]
 
     @property
     def count(self):
@@ -343,30 +457,78 @@ ws_mgr = WSManager()
 
 
 # ── Helper ───────────────────────────────
-def safe_round(val, decimals=2):
-    if pd.notnull(val):
-        return round(float(val), decimals)
-    return None
+# Indicator columns sent by /chart, with their rounding precision
+CHART_INDICATORS = {
+    "rsi_14": 2, "sma_20": 2, "sma_50": 2, "ema_12": 2, "ema_26": 2,
+    "macd": 4, "macd_signal": 4, "macd_histogram": 4,
+    "bb_upper": 2, "bb_middle": 2, "bb_lower": 2,
+    "vwap": 2, "atr_14": 4, "stoch_k": 2, "stoch_d": 2, "obv": 0,
+}
+
+
+def _round_col(arr, decimals=2) -> list:
+    """Round a float column in one numpy call; NaN becomes None."""
+    arr = np.asarray(arr, dtype=np.float64)
+    out = np.round(arr, decimals).astype(object)
+    out[np.isnan(arr)] = None
+    return out.tolist()
+
+
+def _int_col(arr) -> list:
+    """Integer column (e.g. Volume) as a list; NaN becomes None."""
+    arr = np.asarray(arr, dtype=np.float64)
+    mask = np.isnan(arr)
+    out = np.where(mask, 0, arr).astype(np.int64).astype(object)
+    out[mask] = None
+    return out.tolist()
+
 
+INTRADAY = frozenset(("1m", "2m", "5m", "15m", "30m", "1h"))
+_FMT = {"intra": "%H:%M", "day": "%Y-%m-%d"}
 
-def time_fmt(idx, interval):
-    intraday = interval in ("1m", "2m", "5m", "15m", "30m", "1h")
-    return idx.strftime("%H:%M") if intraday else idx.strftime("%Y-%m-%d")
+
+def _format_index(idx: pd.DatetimeIndex, interval: str) -> List[str]:
+    return idx.strftime(_FMT["intra" if interval in INTRADAY else "day"]).tolist()
 
 
 # ══════════════════════════════════════════
 #  CACHED DATA FETCHER (single source of truth)
 # ══════════════════════════════════════════
 
-def fetch_enriched(ticker: str, period: str, interval: str) -> pd.DataFrame:
+# Fetches currently running, keyed like the cache
+_inflight: Dict[str, asyncio.Future] = {}
+
+
+async def _coalesced(key: str, fn, *args):
+    """
+    Run blocking fn(*args) on YF_POOL, once per key.
+    Concurrent callers for the same key await the same result.
     """
-    Single function for ALL data fetching.
+    fut = _inflight.get(key)
+    if fut is None:
+        loop = asyncio.get_running_loop()
+        fut = loop.run_in_executor(YF_POOL, fn, *args)
+        _inflight[key] = fut
+        fut.add_done_callback(lambda _: _inflight.pop(key, None))
+    # shield: one caller going away must not cancel the others' fetch
+    return await asyncio.shield(fut)
+
+
+def enriched_ttl(interval: str) -> int:
+    # Cache longer for slower timeframes
+    return 30 if interval in ("1m", "5m") else 90 if interval in ("15m", "30m") else 180
+
+
+def load_enriched(ticker: str, period: str, interval: str) -> pd.DataFrame:
+    """
+    Single function for ALL data fetching (blocking).
     Uses cache so multiple features share the same Yahoo call.
+    The cache entry is (df, formatted index) — see index_labels.
     """
     key = f"df:{ticker}:{period}:{interval}"
     hit = cache.get(key)
     if hit is not None:
-        return hit
+        return hit[0]
 
     log.info(f"Yahoo fetch: {ticker} {period}/{interval}")
     df = safe_history(ticker, period=period, interval=interval)
@@ -376,19 +538,55 @@ def fetch_enriched(ticker: str, period: str, interval: str) -> pd.DataFrame:
 
     df = TA.enrich(df)
 
-    # Cache longer for slower timeframes
-    ttl = 30 if interval in ("1m", "5m") else 90 if interval in ("15m", "30m") else 180
-    cache.set(key, df, ttl)
+    cache.set(key, (df, _format_index(df.index, interval)), enriched_ttl(interval))
     return df
 
 
-def fetch_quote_data(ticker: str) -> dict:
-    """Cached quote — reuses data, single Yahoo call."""
-    key = f"quote:{ticker}"
+async def fetch_enriched(ticker: str, period: str, interval: str) -> pd.DataFrame:
+    """Async entry point — concurrent misses share one Yahoo call."""
+    key = f"df:{ticker}:{period}:{interval}"
     hit = cache.get(key)
+    if hit is not None:
+        return hit[0]
+    return await _coalesced(key, load_enriched, ticker, period, interval)
+
+
+def index_labels(ticker: str, period: str, interval: str, df: pd.DataFrame) -> List[str]:
+    """
+    Formatted timestamps for an enriched frame, cached in the frame's
+    own entry so warm chart requests skip strftime entirely.
+    """
+    hit = cache.get(f"df:{ticker}:{period}:{interval}")
+    if hit is not None and hit[0] is df:
+        return hit[1]
+    return _format_index(df.index, interval)
+
+
+# Quotes are memoised per (ticker, wall-clock minute): every caller in the
+# same minute shares one result object, matching Yahoo's own freshness
+QUOTE_MEMO_MAX = 500
+_quote_memo: OrderedDict[Tuple[str, int], dict] = OrderedDict()
+
+
+def _quote_key(ticker: str) -> Tuple[str, int]:
+    return ticker, int(time.time() // 60)
+
+
+def fetch_quote_data(ticker: str) -> dict:
+    """Memoised quote — at most one Yahoo call per ticker per minute."""
+    k = _quote_key(ticker)
+    hit = _quote_memo.get(k)
     if hit is not None:
         return hit
 
+    result = _load_quote(ticker)
+    _quote_memo[k] = result
+    if len(_quote_memo) > QUOTE_MEMO_MAX:
+        _quote_memo.popitem(last=False)
+    return result
+
+
+def _load_quote(ticker: str) -> dict:
     log.info(f"Yahoo quote: {ticker}")
     yahoo_throttle()
     stock = yf.Ticker(ticker)
@@ -427,16 +625,27 @@ def fetch_quote_data(ticker: str) -> dict:
         "timestamp": datetime.now().isoformat(),
     }
 
-    cache.set(key, result, 60)  # cache quote for 60s
     return result
 
 
+async def fetch_quote(ticker: str) -> dict:
+    """Async entry point — concurrent misses share one Yahoo call."""
+    hit = _quote_memo.get(_quote_key(ticker))
+    if hit is not None:
+        return hit
+    return await _coalesced(f"quote:{ticker}", fetch_quote_data, ticker)
+
+
 # ══════════════════════════════════════════
 #  APP
 # ══════════════════════════════════════════
 BOOT = time.time()
 
-app = FastAPI(title="Stock Analytics API", version="2.1")
+app = FastAPI(
+    title="Stock Analytics API",
+    version="2.1",
+    default_response_class=ORJSONResponse,
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -472,61 +681,59 @@ def health():
 
 
 # ── Chart ────────────────────────────────
+def build_chart(key: str, ticker: str, period: str, interval: str, df: pd.DataFrame) -> bytes:
+    """Chart payload for an enriched frame as JSON (blocking, runs in a thread)."""
+    times = index_labels(ticker, period, interval, df)
+    ohlc = [_round_col(df[col], 2) for col in ("Open", "High", "Low", "Close")]
+    volume = _int_col(df["Volume"])
+    names = list(CHART_INDICATORS)
+    indicators = [_round_col(df[n], d) for n, d in CHART_INDICATORS.items()]
+
+    data = [
+        {
+            "time": t,
+            "open": o,
+            "high": h,
+            "low": l,
+            "close": c,
+            "volume": v,
+            "indicators": dict(zip(names, ind)),
+        }
+        for t, o, h, l, c, v, *ind in zip(times, *ohlc, volume, *indicators)
+    ]
+
+    result = {
+        "ticker": ticker,
+        "period": period,
+        "interval": interval,
+        "points": len(data),
+        "data": data,
+    }
+
+    ttl = 30 if interval in ("1m", "5m", "15m") else 120
+    return cache.set(key, result, ttl, prerender=True)
+
+
 @app.get("/api/stock/{ticker}/chart")
-def get_chart(
+async def get_chart(
     ticker: str,
     period: str = Query("1d"),
     interval: str = Query("5m"),
 ):
     ticker = ticker.upper()
     key = f"chart:{ticker}:{period}:{interval}"
-    hit = cache.get(key)
-    if hit is not None:
-        return hit
+    raw = cache.get_bytes(key)
+    if raw is not None:
+        return Response(content=raw, media_type="application/json")
 
     try:
-        df = fetch_enriched(ticker, period, interval)
-
-        data = []
-        for idx, r in df.iterrows():
-            data.append({
-                "time": time_fmt(idx, interval),
-                "open": round(float(r["Open"]), 2),
-                "high": round(float(r["High"]), 2),
-                "low": round(float(r["Low"]), 2),
-                "close": round(float(r["Close"]), 2),
-                "volume": int(r["Volume"]),
-                "indicators": {
-                    "rsi_14": safe_round(r.get("rsi_14")),
-                    "sma_20": safe_round(r.get("sma_20")),
-                    "sma_50": safe_round(r.get("sma_50")),
-                    "ema_12": safe_round(r.get("ema_12")),
-                    "ema_26": safe_round(r.get("ema_26")),
-                    "macd": safe_round(r.get("macd"), 4),
-                    "macd_signal": safe_round(r.get("macd_signal"), 4),
-                    "macd_histogram": safe_round(r.get("macd_histogram"), 4),
-                    "bb_upper": safe_round(r.get("bb_upper")),
-                    "bb_middle": safe_round(r.get("bb_middle")),
-                    "bb_lower": safe_round(r.get("bb_lower")),
-                    "vwap": safe_round(r.get("vwap")),
-                    "atr_14": safe_round(r.get("atr_14"), 4),
-                    "stoch_k": safe_round(r.get("stoch_k")),
-                    "stoch_d": safe_round(r.get("stoch_d")),
-                    "obv": safe_round(r.get("obv"), 0),
-                },
-            })
-
-        result = {
-            "ticker": ticker,
-            "period": period,
-            "interval": interval,
-            "points": len(data),
-            "data": data,
-        }
+        df = await fetch_enriched(ticker, period, interval)
 
-        ttl = 30 if interval in ("1m", "5m", "15m") else 120
-        cache.set(key, result, ttl)
-        return result
+        # Row building is CPU work — keep it off the event loop
+        raw = await asyncio.to_thread(
+            build_chart, key, ticker, period, interval, df
+        )
+        return Response(content=raw, media_type="application/json")
 
     except HTTPException:
         raise
@@ -537,10 +744,10 @@ def get_chart(
 
 # ── Quote ────────────────────────────────
 @app.get("/api/stock/{ticker}/quote")
-def get_quote(ticker: str):
+async def get_quote(ticker: str):
     ticker = ticker.upper()
     try:
-        return fetch_quote_data(ticker)
+        return await fetch_quote(ticker)
     except HTTPException:
         raise
     except Exception as e:
@@ -553,9 +760,9 @@ def get_quote(ticker: str):
 def get_info(ticker: str):
     ticker = ticker.upper()
     key = f"info:{ticker}"
-    hit = cache.get(key)
-    if hit is not None:
-        return hit
+    raw = cache.get_bytes(key)
+    if raw is not None:
+        return Response(content=raw, media_type="application/json")
 
     try:
         log.info(f"Yahoo info: {ticker}")
@@ -585,8 +792,8 @@ def get_info(ticker: str):
             "exchange": info.get("exchange"),
         }
 
-        cache.set(key, result, 600)
-        return result
+        raw = cache.set(key, result, 600, prerender=True)
+        return Response(content=raw, media_type="application/json")
 
     except Exception as e:
         log.error(f"Info error: {e}")
@@ -595,14 +802,14 @@ def get_info(ticker: str):
 
 # ── Signals ──────────────────────────────
 @app.get("/api/stock/{ticker}/signals")
-def get_signals(
+async def get_signals(
     ticker: str,
     period: str = Query("1mo"),
     interval: str = Query("1d"),
 ):
     ticker = ticker.upper()
     try:
-        df = fetch_enriched(ticker, period, interval)
+        df = await fetch_enriched(ticker, period, interval)
         sigs = SignalEngine.evaluate(df)
 
         buys = sum(1 for s in sigs if s["signal"] == "BUY")
@@ -630,10 +837,10 @@ def get_signals(
 
 # ── Fibonacci ────────────────────────────
 @app.get("/api/stock/{ticker}/fibonacci")
-def get_fibonacci(ticker: str, period: str = Query("3mo")):
+async def get_fibonacci(ticker: str, period: str = Query("3mo")):
     ticker = ticker.upper()
     try:
-        df = fetch_enriched(ticker, period, "1d")
+        df = await fetch_enriched(ticker, period, "1d")
 
         hi = float(df["High"].max())
         lo = float(df["Low"].min())
@@ -664,9 +871,9 @@ def get_fibonacci(ticker: str, period: str = Query("3mo")):
 @app.get("/api/search/{query}")
 def search_stocks(query: str, limit: int = Query(8)):
     key = f"search:{query.lower()}"
-    hit = cache.get(key)
-    if hit is not None:
-        return hit
+    raw = cache.get_bytes(key)
+    if raw is not None:
+        return Response(content=raw, media_type="application/json")
 
     results = []
 
@@ -697,8 +904,8 @@ def search_stocks(query: str, limit: int = Query(8)):
         except Exception:
             pass
 
-    cache.set(key, results, 300)
-    return results
+    raw = cache.set(key, results, 300, prerender=True)
+    return Response(content=raw, media_type="application/json")
 
 
 # ── Compare ──────────────────────────────
@@ -737,30 +944,54 @@ def compare_stocks(
         normalised = (closes / closes.iloc[0]) * 100
         corr = closes.pct_change().dropna().corr()
 
-        chart_data = []
-        for d in normalised.index:
-            point = {"date": d.strftime("%Y-%m-%d")}
-            for s in normalised.columns:
-                v = normalised.loc[d, s]
-                if pd.notnull(v):
-                    point[s] = round(float(v), 2)
-            chart_data.append(point)
-
-        performance = {}
-        for sym in closes.columns:
-            s = closes[sym].dropna()
-            if len(s) < 2:
-                continue
-            ret = ((s.iloc[-1] / s.iloc[0]) - 1) * 100
-            vol = s.pct_change().std() * (252 ** 0.5) * 100
-            performance[sym] = {
-                "return_pct": round(float(ret), 2),
-                "volatility_pct": round(float(vol), 2),
-                "start": round(float(s.iloc[0]), 2),
-                "end": round(float(s.iloc[-1]), 2),
-                "high": round(float(s.max()), 2),
-                "low": round(float(s.min()), 2),
+        dates = normalised.index.strftime("%Y-%m-%d").tolist()
+        cols = list(normalised.columns)
+        norm_vals = np.round(normalised.to_numpy(dtype=np.float64), 2).tolist()
+        chart_data = [
+            {"date": d, **{c: v for c, v in zip(cols, row) if v == v}}
+            for d, row in zip(dates, norm_vals)
+        ]
+
+        # Performance needs at least two prices per ticker; dropping the
+        # rest up front keeps nanmax/nanmin/nanstd away from all-NaN columns
+        px = closes.to_numpy(dtype=np.float64)
+        keep = (~np.isnan(px)).sum(axis=0) >= 2
+        perf_syms = [c for c, k in zip(cols, keep.tolist()) if k]
+        px = px[:, keep]
+        valid = ~np.isnan(px)
+        col_i = np.arange(px.shape[1])
+        # Previous valid price per cell (forward fill), so daily returns
+        # span gaps the same way pct_change on the dropna'd series does
+        last_valid = np.maximum.accumulate(
+            np.where(valid, np.arange(len(px))[:, None], 0), axis=0
+        )
+        filled = px[last_valid, col_i]
+        start = px[valid.argmax(axis=0), col_i]
+        end = px[len(px) - 1 - valid[::-1].argmax(axis=0), col_i]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ret = (end / start - 1) * 100
+            daily = px[1:] / filled[:-1] - 1
+        # A single return has no sample std (ddof=1) — leave it NaN
+        many = (~np.isnan(daily)).sum(axis=0) >= 2
+        vol = np.full(px.shape[1], np.nan)
+        vol[many] = np.nanstd(daily[:, many], axis=0, ddof=1) * (252 ** 0.5) * 100
+        high = np.nanmax(px, axis=0)
+        low = np.nanmin(px, axis=0)
+
+        performance = {
+            sym: {
+                "return_pct": r,
+                "volatility_pct": v,
+                "start": s0,
+                "end": s1,
+                "high": hi,
+                "low": lo,
             }
+            for sym, r, v, s0, s1, hi, lo in zip(
+                perf_syms,
+                *(np.round(a, 2).tolist() for a in (ret, vol, start, end, high, low)),
+            )
+        }
 
         corr_matrix = {
             r: {c: round(float(corr.loc[r, c]), 4) for c in corr.columns}
@@ -784,9 +1015,9 @@ def compare_stocks(
 @app.get("/api/market/overview")
 def market_overview():
     key = "market:overview"
-    hit = cache.get(key)
-    if hit is not None:
-        return hit
+    raw = cache.get_bytes(key)
+    if raw is not None:
+        return Response(content=raw, media_type="application/json")
 
     market = {
         "indices": ["^GSPC", "^DJI", "^IXIC", "^BSESN", "^NSEI"],
@@ -804,53 +1035,83 @@ def market_overview():
             all_syms, period="5d", interval="1d",
             group_by="ticker", progress=False,
         )
+        close = raw.xs("Close", level=1, axis=1).reindex(columns=all_syms)
+        vol = raw.xs("Volume", level=1, axis=1).reindex(columns=all_syms)
+        close = close.to_numpy(dtype=np.float64)
+        vol = vol.to_numpy(dtype=np.float64)
     except Exception as e:
         log.error(f"Market error: {e}")
         return {"indices": [], "mega_cap": []}
 
-    result = {}
-    for category, syms in market.items():
-        items = []
-        for sym in syms:
-            try:
-                df = raw[sym] if len(all_syms) > 1 else raw
-                df = df.dropna()
-                if len(df) < 2:
-                    continue
-                price = float(df["Close"].iloc[-1])
-                prev = float(df["Close"].iloc[-2])
-                items.append({
-                    "symbol": sym,
-                    "price": round(price, 2),
-                    "change": round(price - prev, 2),
-                    "change_pct": round((price - prev) / prev * 100, 2),
-                    "volume": int(df["Volume"].iloc[-1]),
-                })
-            except Exception:
-                continue
-        result[category] = items
+    # Exchanges trade on different days, so take each symbol's own last
+    # two valid rows rather than the last two rows of the frame
+    rows = np.arange(len(close))[:, None]
+    pos = np.where(~np.isnan(close) & ~np.isnan(vol), rows, -1)
+    last_i = pos.max(axis=0, initial=-1)
+    prev_i = np.where(pos == last_i, -1, pos).max(axis=0, initial=-1)
+    cols = np.arange(len(all_syms))
+
+    price = close[last_i, cols]
+    prev = close[prev_i, cols]
+    change = price - prev
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change_pct = change / prev * 100
+
+    quotes = {
+        sym: {
+            "symbol": sym,
+            "price": p,
+            "change": c,
+            "change_pct": pct,
+            "volume": int(v),
+        }
+        for sym, ok, p, c, pct, v in zip(
+            all_syms,
+            (prev_i >= 0).tolist(),
+            np.round(price, 2).tolist(),
+            np.round(change, 2).tolist(),
+            np.round(change_pct, 2).tolist(),
+            vol[last_i, cols].tolist(),
+        )
+        if ok
+    }
+    result = {
+        category: [quotes[s] for s in syms if s in quotes]
+        for category, syms in market.items()
+    }
 
-    cache.set(key, result, 120)  # cache 2 min
-    return result
+    raw = cache.set(key, result, 120, prerender=True)  # cache 2 min
+    return Response(content=raw, media_type="application/json")
 
 
 # ── Legacy ───────────────────────────────
+def build_legacy(ticker: str, df: pd.DataFrame) -> dict:
+    """Legacy 1m payload for an enriched frame (blocking, runs in a thread)."""
+    times = index_labels(ticker, "1d", "1m", df)
+    data = [
+        {
+            "time": t,
+            "price": p,
+            "volume": v,
+            "rsi": r,
+        }
+        for t, p, v, r in zip(
+            times,
+            _round_col(df["Close"]),
+            _int_col(df["Volume"]),
+            _round_col(df["rsi_14"]),
+        )
+    ]
+
+    return {"ticker": ticker, "data": data}
+
+
 @app.get("/api/stock/{ticker}")
-def legacy_stock(ticker: str):
+async def legacy_stock(ticker: str):
     ticker = ticker.upper()
     try:
-        df = fetch_enriched(ticker, "1d", "1m")
-
-        data = []
-        for idx, r in df.iterrows():
-            data.append({
-                "time": idx.strftime("%H:%M"),
-                "price": round(float(r["Close"]), 2),
-                "volume": int(r["Volume"]),
-                "rsi": safe_round(r.get("rsi_14")),
-            })
-
-        return {"ticker": ticker, "data": data}
+        df = await fetch_enriched(ticker, "1d", "1m")
+        return await asyncio.to_thread(build_legacy, ticker, df)
 
     except HTTPException:
         raise
@@ -886,13 +1147,14 @@ async def live_stream(ws: WebSocket, ticker: str):
         while True:
             try:
                 # ── Use CACHED quote (0 or 1 Yahoo call) ──
-                quote = fetch_quote_data(ticker)
+                quote = await fetch_quote(ticker)
 
                 # ── Get RSI from cached chart data ──
                 rsi_val = None
                 try:
                     chart_key = f"df:{ticker}:1d:5m"
-                    df = cache.get(chart_key)
+                    hit = cache.get(chart_key)
+                    df = hit[0] if hit is not None else None
                     if df is not None and not df.empty:
                         last_rsi = df["rsi_14"].iloc[-1]
                         if pd.notnull(last_rsi):
@@ -962,13 +1224,29 @@ async def startup():
     log.info("=" * 50)
 
 
+@app.on_event("shutdown")
+async def shutdown():
+    YF_POOL.shutdown(wait=False, cancel_futures=True)
+
+
 # ── Run ──────────────────────────────────
 if __name__ == "__main__":
     import uvicorn
 
+    # uvloop ships with uvicorn[standard] but has no Windows build
+    loop = "asyncio"
+    if sys.platform != "win32":
+        try:
+            import uvloop  # noqa: F401
+            loop = "uvloop"
+        except ImportError:
+            pass
+
     uvicorn.run(
         app,
         host="127.0.0.1",
         port=8000,
         log_level="info",
+        loop=loop,
+        timeout_keep_alive=30,
     )
\ No newline at end of file